@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for /search-profiles response serialization.
+
+Compares the previous path (full profile documents through FastAPI's
+jsonable_encoder and JSONResponse) with the current one (validated PersonProfile
+projection rendered by FastJSONResponse) on a 100-profile response.
+
+Usage:
+	python bench_serialization.py [--profiles 100] [--repeat 200]
+"""
+import argparse
+import datetime
+import random
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from serialization import FastJSONResponse, slim_profiles
+
+
+def make_profile(i: int) -> dict:
+	"""
+	Build a synthetic enriched profile shaped like a Proxycurl person profile.
+	"""
+	now = datetime.datetime.now()
+
+	def date(days):
+		day = now - datetime.timedelta(days=days)
+		return {"day": day.day, "month": day.month, "year": day.year}
+
+	return {
+		"linkedin_profile_url": f"https://www.linkedin.com/in/profile-{i}",
+		"public_identifier": f"profile-{i}",
+		"full_name": f"Person {i}",
+		"first_name": "Person",
+		"last_name": str(i),
+		"profile_pic_url": f"https://example.com/pic/{i}.jpg",
+		"background_cover_image_url": f"https://example.com/cover/{i}.jpg",
+		"headline": "Senior Software Engineer at Example",
+		"occupation": "Software Engineer at Example",
+		"summary": "Backend engineer working on distributed systems. " * 8,
+		"country": "PK",
+		"country_full_name": "Pakistan",
+		"city": "Lahore",
+		"state": "Punjab",
+		"skills": [f"Skill {n}" for n in range(30)],
+		"languages": ["English", "Urdu"],
+		"experiences": [
+			{
+				"starts_at": date(365 * (n + 1)),
+				"ends_at": date(365 * n) if n else None,
+				"company": f"Company {n}",
+				"company_linkedin_profile_url": f"https://www.linkedin.com/company/company-{n}",
+				"title": "Software Engineer",
+				"description": "Built and operated services. " * 5,
+				"location": "Lahore, Pakistan",
+				"logo_url": f"https://example.com/logo/{n}.png"
+			}
+			for n in range(6)
+		],
+		"education": [
+			{
+				"starts_at": date(365 * 10),
+				"ends_at": date(365 * 6),
+				"school": "University",
+				"degree_name": "BSc",
+				"field_of_study": "Computer Science"
+			}
+			for _ in range(2)
+		],
+		"certifications": [{"name": f"Certification {n}", "authority": "Authority"} for n in range(5)],
+		"relevance_score": random.random(),
+		"last_updated": now - datetime.timedelta(days=random.randint(0, 60))
+	}
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark search response serialization.")
+	parser.add_argument("--profiles", type=int, default=100, help="Profiles per response")
+	parser.add_argument("--repeat", type=int, default=200, help="Responses to serialize per measurement")
+	args = parser.parse_args(argv)
+
+	profiles = [make_profile(i) for i in range(args.profiles)]
+
+	cases = {
+		"before: jsonable_encoder + JSONResponse": lambda: JSONResponse(content=jsonable_encoder(profiles)),
+		"slim_profiles + jsonable_encoder": lambda: JSONResponse(content=jsonable_encoder(slim_profiles(profiles))),
+		"after: slim_profiles + FastJSONResponse": lambda: FastJSONResponse(content=slim_profiles(profiles)),
+	}
+	for name, case in cases.items():
+		size = len(case().body)
+		best = min(timeit.repeat(case, number=args.repeat, repeat=5)) / args.repeat
+		print(f"{name:<42} {best * 1000:8.3f} ms/response {size / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,367 @@
+"""
+Bulk offline ingestion of Proxycurl profile dumps into MongoDB.
+
+Streams JSONL (optionally gzip-compressed) files of Proxycurl-shaped person
+profiles, normalizes them against the fields searched by
+`Database._generate_mongo_query`, and writes them with unordered bulk upserts
+keyed on `linkedin_profile_url`.
+
+Usage:
+	python bulk_ingest.py dump-1.jsonl.gz dump-2.jsonl --uri mongodb://localhost:27017
+"""
+import argparse
+import datetime
+import gzip
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo import errors as mongo_errors
+from pymongo.mongo_client import MongoClient
+
+from person_profile import LINKEDIN_PREFIX, canonical_profile_url
+from settings import get_settings
+
+# Fields used by the Atlas search query, plus the ones projected back to clients
+TEXT_FIELDS = ("country", "city", "headline", "occupation", "summary", "full_name", "profile_pic_url",
+			   "background_cover_image_url")
+
+
+def open_dump(path: str):
+	"""
+	Open a profile dump for line-by-line reading, transparently handling gzip.
+	:param path: Path to a .jsonl or .jsonl.gz file ("-" for stdin)
+	:return: Text file object
+	"""
+	if path == "-":
+		return sys.stdin
+	with open(path, "rb") as f:
+		magic = f.read(2)
+	if magic == b"\x1f\x8b":
+		return gzip.open(path, "rt", encoding="utf-8")
+	return open(path, "r", encoding="utf-8")
+
+
+def read_records(path: str, skip: int = 0) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+	"""
+	Yield (line_number, record) pairs from a dump. Unparseable lines yield None.
+	:param path: Path to the dump
+	:param skip: Number of leading lines to skip (used when resuming)
+	:return: Generator of (line_number, record)
+	"""
+	with open_dump(path) as f:
+		for line_no, line in enumerate(itertools.islice(f, skip, None), start=skip + 1):
+			line = line.strip()
+			if not line:
+				yield line_no, None
+				continue
+			try:
+				yield line_no, json.loads(line)
+			except json.JSONDecodeError:
+				yield line_no, None
+
+
+def normalize_profile_url(profile: Dict[str, Any]) -> Optional[str]:
+	"""
+	Build the canonical LinkedIn profile URL of a Proxycurl profile.
+	:param profile: Raw profile
+	:return: Canonical URL, or None if it cannot be determined
+	"""
+	url = profile.get("linkedin_profile_url") or profile.get("url")
+	if not url and profile.get("public_identifier"):
+		url = LINKEDIN_PREFIX + str(profile["public_identifier"])
+	return canonical_profile_url(url)
+
+
+def parse_timestamp(value: Any) -> Optional[datetime.datetime]:
+	"""
+	Parse a `last_updated` value from a dump (datetime, ISO 8601 string or Unix timestamp).
+	:param value: Raw value
+	:return: Naive local datetime, as stored by the API, or None if it cannot be parsed
+	"""
+	if isinstance(value, dict) and "$date" in value:
+		value = value["$date"]
+	try:
+		if isinstance(value, datetime.datetime):
+			timestamp = value
+		elif isinstance(value, (int, float)) and not isinstance(value, bool):
+			timestamp = datetime.datetime.fromtimestamp(value)
+		elif isinstance(value, str):
+			timestamp = datetime.datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+		else:
+			return None
+	except (ValueError, OverflowError, OSError):
+		return None
+	if timestamp.tzinfo is not None:
+		timestamp = timestamp.astimezone().replace(tzinfo=None)
+	return timestamp
+
+
+def normalize_profile(profile: Any) -> Optional[Dict[str, Any]]:
+	"""
+	Normalize and validate a Proxycurl profile for storage.
+	:param profile: Raw profile
+	:return: Normalized profile, or None if the profile is invalid
+	"""
+	if not isinstance(profile, dict):
+		return None
+	# Search results wrap the full profile under "profile"
+	if isinstance(profile.get("profile"), dict):
+		inner = dict(profile["profile"])
+		inner.setdefault("linkedin_profile_url", profile.get("linkedin_profile_url"))
+		profile = inner
+
+	url = normalize_profile_url(profile)
+	if not url:
+		return None
+	profile = dict(profile)
+	profile.pop("_id", None)
+	profile["linkedin_profile_url"] = url
+
+	for field in TEXT_FIELDS:
+		value = profile.get(field)
+		if value is None:
+			continue
+		if not isinstance(value, str):
+			profile[field] = None
+			continue
+		profile[field] = value.strip() or None
+
+	# country is a required search field and must be an Alpha-2 code
+	country = profile.get("country")
+	if not country or len(country) != 2:
+		return None
+	profile["country"] = country.upper()
+
+	# Keep the dump's own timestamp when it has one, so old data is not mistaken for fresh data
+	last_updated = parse_timestamp(profile.get("last_updated"))
+	if last_updated is None:
+		profile.pop("last_updated", None)
+	else:
+		profile["last_updated"] = last_updated
+
+	skills = profile.get("skills") or []
+	if isinstance(skills, str):
+		skills = skills.split(",")
+	if not isinstance(skills, list):
+		skills = []
+	profile["skills"] = list(dict.fromkeys(s.strip() for s in skills if isinstance(s, str) and s.strip()))
+
+	return profile
+
+
+def batched(records: Iterable[Tuple[int, Optional[Dict[str, Any]]]], size: int,
+			stats: Dict[str, int]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+	"""
+	Normalize records and group them into batches deduplicated on `linkedin_profile_url`.
+	Later records in a batch win over earlier ones. Only duplicates within a batch are counted in
+	`batch_duplicates`; duplicates across batches are merged by the upsert and show up as updates.
+	:param records: (line_number, record) pairs
+	:param size: Maximum batch size
+	:param stats: Counters updated in place
+	:return: Generator of (last_line_number, profiles)
+	"""
+	batch: Dict[str, Dict[str, Any]] = {}
+	line_no = last_yielded = 0
+	for line_no, record in records:
+		stats["read"] += 1
+		profile = normalize_profile(record)
+		if profile is None:
+			stats["invalid"] += 1
+			continue
+		url = profile["linkedin_profile_url"]
+		if url in batch:
+			stats["batch_duplicates"] += 1
+		batch[url] = profile
+		if len(batch) >= size:
+			yield line_no, list(batch.values())
+			batch = {}
+			last_yielded = line_no
+	# Also flush when only invalid lines remain so the checkpoint moves past them
+	if line_no > last_yielded:
+		yield line_no, list(batch.values())
+
+
+def write_batch(collection, profiles: List[Dict[str, Any]], date_time: datetime.datetime) -> Tuple[int, int, int]:
+	"""
+	Upsert a batch of profiles with a single unordered bulk write.
+	:param collection: MongoDB collection
+	:param profiles: Normalized profiles
+	:param date_time: Value stored in `last_updated` for profiles without their own timestamp
+	:return: (upserted, modified, errors)
+	"""
+	if not profiles:
+		return 0, 0, 0
+	operations = []
+	for profile in profiles:
+		profile.setdefault("last_updated", date_time)
+		operations.append(UpdateOne(
+			{"linkedin_profile_url": profile["linkedin_profile_url"]},
+			{"$set": profile},
+			upsert=True
+		))
+	try:
+		result = collection.bulk_write(operations, ordered=False)
+		return result.upserted_count, result.modified_count, 0
+	except mongo_errors.BulkWriteError as e:
+		details = e.details
+		return details.get("nUpserted", 0), details.get("nModified", 0), len(details.get("writeErrors", []))
+
+
+class Checkpoint:
+	"""
+	Tracks, per input file, the number of lines whose batches have been fully written.
+	Batches finish out of order, so only the contiguous prefix of completed batches is recorded.
+	"""
+	def __init__(self, path: Optional[str]):
+		self.path = path
+		self.state: Dict[str, int] = {}
+		if path and os.path.exists(path):
+			with open(path, "r", encoding="utf-8") as f:
+				self.state = json.load(f)
+
+	def position(self, source: str) -> int:
+		return self.state.get(os.path.abspath(source), 0)
+
+	def save(self, source: str, line_no: int):
+		if not self.path:
+			return
+		self.state[os.path.abspath(source)] = line_no
+		tmp_path = f"{self.path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(self.state, f)
+		os.replace(tmp_path, self.path)
+
+
+def ingest_file(collection, source: str, checkpoint: Checkpoint, batch_size: int, workers: int,
+				stats: Dict[str, int], as_of: Optional[datetime.datetime] = None):
+	"""
+	Ingest one dump, keeping at most `workers * 2` batches in memory at a time.
+	:param collection: MongoDB collection
+	:param source: Path to the dump
+	:param checkpoint: Checkpoint store
+	:param batch_size: Profiles per bulk write
+	:param workers: Number of concurrent bulk writes
+	:param stats: Counters updated in place
+	:param as_of: When the dump was taken; stored as `last_updated` for profiles without their own timestamp.
+		Defaults to the file's modification time (the current time for stdin).
+	:return: None
+	"""
+	skip = 0 if source == "-" else checkpoint.position(source)
+	if skip:
+		print(f"Resuming {source} from line {skip + 1}")
+	date_time = as_of
+	if date_time is None:
+		date_time = datetime.datetime.now() if source == "-" else datetime.datetime.fromtimestamp(os.path.getmtime(source))
+	# Line numbers of submitted batches, in order, and whether each has completed
+	pending: Dict[Any, int] = {}
+	done_lines: Dict[int, bool] = {}
+	order: List[int] = []
+
+	def advance():
+		while order and done_lines.get(order[0]):
+			line_no = order.pop(0)
+			done_lines.pop(line_no)
+			if source != "-":
+				checkpoint.save(source, line_no)
+
+	def collect(futures):
+		for future in futures:
+			line_no = pending.pop(future)
+			upserted, modified, errors = future.result()
+			stats["upserted"] += upserted
+			stats["modified"] += modified
+			stats["errors"] += errors
+			done_lines[line_no] = True
+		advance()
+
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		for line_no, profiles in batched(read_records(source, skip), batch_size, stats):
+			if len(pending) >= workers * 2:
+				finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+				collect(finished)
+			future = executor.submit(write_batch, collection, profiles, date_time)
+			pending[future] = line_no
+			done_lines[line_no] = False
+			order.append(line_no)
+		finished, _ = wait(pending)
+		collect(finished)
+
+
+def mongo_config() -> Tuple[Optional[str], Optional[str], Optional[str]]:
+	"""
+	Read the MongoDB URI, database and collection from config.cfg, if present.
+	:return: (uri, db, collection)
+	"""
+	try:
+		mongo = get_settings().mongodb
+	except KeyError:
+		return None, None, None
+	return mongo.uri, mongo.db, mongo.collection
+
+
+def parse_as_of(value: str) -> datetime.datetime:
+	timestamp = parse_timestamp(value)
+	if timestamp is None:
+		raise argparse.ArgumentTypeError(f"invalid ISO date: {value!r}")
+	return timestamp
+
+
+def parse_args(argv=None):
+	parser = argparse.ArgumentParser(description="Bulk load Proxycurl profile dumps (JSONL or gzip) into MongoDB.")
+	parser.add_argument("sources", nargs="+", help="JSONL / JSONL.gz dump files, or - for stdin")
+	parser.add_argument("--uri", default=None, help="MongoDB URI (default: built from config.cfg)")
+	parser.add_argument("--db", default=None, help="Database name (default: MONGODB.DB from config.cfg)")
+	parser.add_argument("--collection", default=None, help="Collection name (default: MONGODB.COLLECTION from config.cfg)")
+	parser.add_argument("--batch-size", type=int, default=1000, help="Profiles per bulk write")
+	parser.add_argument("--workers", type=int, default=4, help="Concurrent bulk writes")
+	parser.add_argument("--checkpoint", default="bulk_ingest.checkpoint.json",
+						help="Checkpoint file used to resume interrupted runs ('' to disable)")
+	parser.add_argument("--as-of", type=parse_as_of, default=None,
+						help="ISO date the dump was taken, stored as last_updated for profiles without one "
+							 "(default: each file's modification time)")
+	return parser.parse_args(argv)
+
+
+def main(argv=None):
+	args = parse_args(argv)
+	uri, db, collection = args.uri, args.db, args.collection
+	if not (uri and db and collection):
+		config_uri, config_db, config_collection = mongo_config()
+		uri, db, collection = uri or config_uri, db or config_db, collection or config_collection
+	if not uri or not db or not collection:
+		print("MongoDB URI, database and collection must be given or set in config.cfg.")
+		return 1
+
+	client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+	profiles_collection = client[db][collection]
+	try:
+		profiles_collection.create_index("linkedin_profile_url", unique=True)
+	except mongo_errors.OperationFailure as e:
+		print(f"Error creating index: {e}")
+
+	checkpoint = Checkpoint(args.checkpoint or None)
+	stats = {"read": 0, "invalid": 0, "batch_duplicates": 0, "upserted": 0, "modified": 0, "errors": 0}
+	start = time.perf_counter()
+	try:
+		for source in args.sources:
+			ingest_file(profiles_collection, source, checkpoint, args.batch_size, args.workers, stats, args.as_of)
+	except KeyboardInterrupt:
+		print("Interrupted; re-run with the same checkpoint to resume.")
+	finally:
+		elapsed = time.perf_counter() - start
+		rate = stats["read"] / elapsed if elapsed else 0.0
+		print(f"Read {stats['read']} records in {elapsed:.1f}s ({rate:.0f} records/s): "
+			  f"{stats['upserted']} inserted, {stats['modified']} updated, {stats['invalid']} invalid, "
+			  f"{stats['batch_duplicates']} duplicates within a batch, {stats['errors']} write errors")
+		client.close()
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,38 +1,73 @@
 import asyncio
-import configparser
+import threading
+from typing import Optional
 
+import pymongo
 from pymongo import errors as mongo_errors
 from pymongo.mongo_client import MongoClient
 
-config = configparser.ConfigParser()
-config.read("config.cfg")
+from deadline import Deadline, remaining_timeout
+from person_profile import canonical_profile_url
+from settings import Settings, get_settings
 
-user_name = config["MONGODB"]["USER_NAME"]
-password = config["MONGODB"]["PASSWORD"]
-cluster = config["MONGODB"]["CLUSTER"]
-db = config["MONGODB"]["DB"]
-collection = config["MONGODB"]["COLLECTION"]
-
-uri = f"mongodb+srv://{user_name}:{password}@{cluster}?retryWrites=true&w=majority"
 
 class Database:
-	def __init__(self):
-		self.client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-		self.db = self.client[db]
-		self.profiles_collection = self.db[collection]
-		self.create_indexes()
+	def __init__(self, settings: Settings = None):
+		self.settings = (settings or get_settings()).mongodb
+		self._client = None
+		self._client_lock = threading.Lock()
+
+	@property
+	def client(self) -> MongoClient:
+		# Built on first use: resolving the mongodb+srv URI is a blocking DNS lookup.
+		# Warm-up and request threads can get here at the same time, so only one of them builds it.
+		with self._client_lock:
+			if self._client is None:
+				self._client = MongoClient(self.settings.uri, serverSelectionTimeoutMS=5000)
+			return self._client
+
+	@property
+	def profiles_collection(self):
+		return self.client[self.settings.db][self.settings.collection]
+
+	def ping(self) -> bool:
+		"""
+		Open a connection to the cluster so the first request does not pay for it.
+		:return: True if the cluster answered, False otherwise
+		"""
+		try:
+			self.client.admin.command("ping")
+			return True
+		except mongo_errors.PyMongoError as e:
+			print(f"Error connecting to MongoDB: {e}")
+			return False
 
-	def create_indexes(self):
+	def close(self):
 		"""
-		Create MongoDB indexes for the profiles collection.
+		Close the MongoDB client if it was ever opened.
 		:return: None
 		"""
+		with self._client_lock:
+			if self._client is not None:
+				self._client.close()
+				self._client = None
+
+	def create_indexes(self) -> bool:
+		"""
+		Create MongoDB indexes for the profiles collection.
+		:return: False if MongoDB could not be reached (worth retrying), True otherwise
+		"""
 		# Create a unique index on the 'linkedin_profile_url' field if it doesn't already exist
 		try:
 			self.profiles_collection.create_index("linkedin_profile_url", unique=True)
 			print("Unique index created for 'linkedin_profile_url'")
-		except mongo_errors.OperationFailure as e:
+		except mongo_errors.ConnectionFailure as e:
+			print(f"Error creating index, MongoDB unreachable: {e}")
+			return False
+		except mongo_errors.PyMongoError as e:
+			# Option conflicts, existing duplicates or missing privileges will not go away on retry
 			print(f"Error creating index: {e}")
+		return True
 
 	@staticmethod
 	def _generate_mongo_query(entities):
@@ -96,10 +131,11 @@ class Database:
 
 		return query
 
-	async def fetch_profiles_from_db(self, entities):
+	async def fetch_profiles_from_db(self, entities, deadline: Optional[Deadline] = None):
 		"""
 		Fetch profiles from the MongoDB database based on the extracted entities.
 		:param entities: Extracted entities from the user query
+		:param deadline: Request deadline; the search is cut off server-side when it runs out
 		:return:
 		"""
 		# Create a search pipeline based on the entities extracted from the user query
@@ -125,29 +161,72 @@ class Database:
 			},
 			{'$sort': {'relevance_score': -1}}
 		]
-		profiles = list(self.profiles_collection.aggregate(search_pipeline))
+		try:
+			profiles = await asyncio.to_thread(self._search_profiles, search_pipeline, remaining_timeout(deadline))
+		except (asyncio.TimeoutError, mongo_errors.PyMongoError) as e:
+			# Server selection, network and server-side (maxTimeMS) timeouts all report e.timeout
+			if isinstance(e, mongo_errors.PyMongoError) and not e.timeout:
+				raise
+			print(f"Profile search exceeded the request deadline: {e}")
+			if deadline:
+				deadline.mark_partial("database timeout")
+			return []
 		return profiles
 
-	async def store_profiles_in_db(self, profiles, date_time):
+	def _search_profiles(self, search_pipeline, timeout: Optional[float]):
+		"""
+		Run the profile search pipeline.
+		:param search_pipeline: Aggregation pipeline
+		:param timeout: Client-side timeout in seconds covering server selection, the network and the
+			server-side run time (pymongo sets maxTimeMS from it), or None
+		:return: List of profiles
+		"""
+		with pymongo.timeout(timeout):
+			return list(self.profiles_collection.aggregate(search_pipeline))
+
+	def _insert_profiles(self, documents, timeout: Optional[float]):
+		"""
+		Insert profiles with one unordered bulk insert, skipping the ones that already exist.
+		:param documents: Profiles to insert
+		:param timeout: Client-side timeout in seconds covering server selection and the write, or None
+		:return: None
+		"""
+		with pymongo.timeout(timeout):
+			try:
+				self.profiles_collection.insert_many(documents, ordered=False)
+			except mongo_errors.BulkWriteError as e:
+				for error in e.details.get("writeErrors", []):
+					if error.get("code") == 11000:
+						print(f"Profile already exists in the database: {error['op'].get('linkedin_profile_url')}")
+					else:
+						print(f"Error inserting profile: {error.get('errmsg')}")
+
+	async def store_profiles_in_db(self, profiles, date_time, deadline: Optional[Deadline] = None):
 		"""
 		Store profiles in the MongoDB database.
 		:param profiles: List of profiles to store
 		:param date_time: Date and time of the last update
+		:param deadline: Request deadline; writes still pending when it runs out are abandoned
 		:return: None
 		"""
-		async def store_profile(profile):
+		if not profiles:
+			return
+		for profile in profiles:
 			profile["last_updated"] = date_time
-			try:
-				self.profiles_collection.insert_one(profile)
-			except mongo_errors.DuplicateKeyError:
-				print(f"Profile already exists in the database: {profile['linkedin_profile_url']}")
-				# skip the duplicate profile
-			except Exception as e:
+			# Same key as bulk ingestion, so one person never ends up in two documents
+			profile["linkedin_profile_url"] = (canonical_profile_url(profile.get("linkedin_profile_url"))
+											   or profile.get("linkedin_profile_url"))
+		# Insert copies so the profiles returned to clients do not pick up an ObjectId '_id'
+		documents = [dict(profile) for profile in profiles]
+		try:
+			await asyncio.to_thread(self._insert_profiles, documents, remaining_timeout(deadline))
+		except (asyncio.TimeoutError, mongo_errors.PyMongoError) as e:
+			if deadline and (isinstance(e, asyncio.TimeoutError) or getattr(e, "timeout", False)):
+				print("Storing profiles exceeded the request deadline.")
+				deadline.mark_partial("database write timeout")
+			else:
 				print(f"Error inserting profiles: {e}")
 
-		tasks = [store_profile(profile) for profile in profiles]
-		await asyncio.gather(*tasks)
-
 	async def update_profile_pic(self, profile_url, profile_pic_url):
 		"""
 		Update the profile picture URL for a given profile URL.
@@ -156,8 +235,9 @@ class Database:
 		:return: None
 		"""
 		try:
-			self.profiles_collection.update_one(
-				{"linkedin_profile_url": profile_url},
+			await asyncio.to_thread(
+				self.profiles_collection.update_one,
+				{"linkedin_profile_url": canonical_profile_url(profile_url) or profile_url},
 				{"$set": {"profile_pic_url": profile_pic_url}}
 			)
 		except Exception as e:
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Deadline:
+	"""
+	Request-scoped time budget shared by every stage of a request.
+	Stages that are skipped or cut short record a reason, marking the result as partial.
+	"""
+	def __init__(self, timeout: float):
+		self.expires_at = time.monotonic() + timeout
+		self.reasons: List[str] = []
+
+	def remaining(self) -> float:
+		return max(0.0, self.expires_at - time.monotonic())
+
+	def expired(self) -> bool:
+		return self.remaining() <= 0
+
+	@property
+	def partial(self) -> bool:
+		return bool(self.reasons)
+
+	def mark_partial(self, reason: str):
+		if reason not in self.reasons:
+			self.reasons.append(reason)
+
+	def allows(self, stage: str, min_budget: float) -> bool:
+		"""
+		Check whether an optional stage still fits in the budget, recording it as skipped if not.
+		:param stage: Stage name
+		:param min_budget: Seconds the stage needs to be worth starting
+		:return: True if the stage should run
+		"""
+		if self.remaining() >= min_budget:
+			return True
+		print(f"Skipping {stage}: {self.remaining():.2f}s left")
+		self.mark_partial(stage)
+		return False
+
+
+def remaining_timeout(deadline: Optional[Deadline], cap: Optional[float] = None) -> Optional[float]:
+	"""
+	Timeout for a single call: the per-call cap, shortened to what is left of the deadline.
+	:param deadline: Request deadline, if any
+	:param cap: Per-call timeout in seconds, if any
+	:return: Timeout in seconds, or None for no limit
+	:raises asyncio.TimeoutError: If the deadline has already expired
+	"""
+	if deadline is None:
+		return cap
+	remaining = deadline.remaining()
+	if remaining <= 0:
+		raise asyncio.TimeoutError()
+	return remaining if cap is None else min(cap, remaining)
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: Optional[float], timeout: Optional[float]) -> T:
+	"""
+	Run `call`, starting a second identical attempt if the first has not finished after `delay` seconds.
+	The first successful result wins and the other attempt is cancelled.
+	:param call: Factory returning a new awaitable for each attempt
+	:param delay: Seconds to wait before hedging, or None to disable hedging
+	:param timeout: Overall timeout in seconds, or None for no limit
+	:return: Result of the first successful attempt
+	:raises asyncio.TimeoutError: If no attempt finishes in time
+	"""
+	if not delay or (timeout is not None and delay >= timeout):
+		return await asyncio.wait_for(call(), timeout)
+
+	loop = asyncio.get_running_loop()
+	expires_at = loop.time() + timeout if timeout is not None else None
+	attempts = {asyncio.ensure_future(call())}
+	try:
+		done, _ = await asyncio.wait(attempts, timeout=delay)
+		if not done:
+			attempts.add(asyncio.ensure_future(call()))
+		error = None
+		while attempts:
+			wait_for = None if expires_at is None else max(0.0, expires_at - loop.time())
+			done, attempts = await asyncio.wait(attempts, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+			if not done:
+				raise asyncio.TimeoutError()
+			for attempt in done:
+				if attempt.exception() is None:
+					return attempt.result()
+				error = attempt.exception()
+		raise error
+	finally:
+		for attempt in attempts:
+			attempt.cancel()
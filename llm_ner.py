@@ -1,6 +1,17 @@
-import configparser
+import asyncio
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
 
 from groq import AsyncGroq
+from pydantic import ValidationError
+
+from deadline import Deadline, hedged, remaining_timeout
+from person_profile import PersonProfileEntities, model_field_types
+from settings import Settings, get_settings
+
+MODEL = "llama3-8b-8192"
 
 SYSTEM_MESSAGE_NER = """
 
@@ -189,41 +200,167 @@ Additional Notes:
 
 """
 
-config = configparser.ConfigParser()
+SYSTEM_MESSAGE_NER_COMPACT = """Extract candidate-search entities from the user query. Reply with one JSON object matching this schema and nothing else:
+{schema}
+Rules:
+- country: Alpha-2 ISO3166 code, default "PK". city: default "Lahore".
+- Values use Boolean search syntax: "a || b" for alternatives, "a && b" for required terms. Add common synonyms, e.g. "Backend Developer || Backend Engineer".
+- Each value is at most 255 characters; use "" for missing fields. page_size defaults to 10.
+- If the query is not about finding candidates, return every field as "".
+Example: "Senior Data Scientist in Berlin, Python and ML, maybe deep learning" -> {{"country": "DE", "current_role_title": "Senior Data Scientist", "region": "Europe", "city": "Berlin", "skills": "Machine Learning && Python || Deep Learning", "page_size": 10}}
+"""
+
+# Maximum length of a single Boolean search expression accepted by Proxycurl
+MAX_EXPRESSION_LENGTH = 255
+# Token budget per field in compact mode: key, quoting and a typical Boolean expression
+TOKENS_PER_FIELD = 32
+
+
+def entities_json_schema() -> Dict[str, Any]:
+	"""
+	Build the JSON schema the NER model must follow from PersonProfileEntities.
+	:return: JSON schema
+	"""
+	properties = {}
+	for name, field_type in model_field_types(PersonProfileEntities).items():
+		if field_type is int:
+			properties[name] = {"type": "integer"}
+		else:
+			properties[name] = {"type": "string", "maxLength": MAX_EXPRESSION_LENGTH}
+	return {"type": "object", "properties": properties, "required": ["country"]}
+
+ENTITIES_JSON_SCHEMA = entities_json_schema()
+COMPACT_MAX_TOKENS = len(ENTITIES_JSON_SCHEMA["properties"]) * TOKENS_PER_FIELD
+
+PROMPT_VARIANTS = {
+	"full": SYSTEM_MESSAGE_NER,
+	"compact": SYSTEM_MESSAGE_NER_COMPACT.format(schema=json.dumps(ENTITIES_JSON_SCHEMA, separators=(",", ":")))
+}
+
+
+def parse_entities(content: str) -> Dict[str, Any]:
+	"""
+	Parse and validate the NER model output against PersonProfileEntities.
+	:param content: Raw model output
+	:return: Extracted entities, or an empty dict if the query is not a candidate search
+	:raises ValueError: If the output is not valid JSON or does not match the schema
+	"""
+	content = (content or "").strip()
+	# Strip a Markdown code fence if the model added one
+	fence = re.match(r"^```(?:json)?\s*(.*?)\s*```$", content, re.DOTALL)
+	if fence:
+		content = fence.group(1)
+	if content.lower() in ("null", "none", ""):
+		return {}
+	try:
+		data = json.loads(content)
+	except json.JSONDecodeError as e:
+		raise ValueError(f"Output is not valid JSON: {e}")
+	if data is None:
+		return {}
+	if not isinstance(data, dict):
+		raise ValueError("Output must be a JSON object.")
+
+	fields = model_field_types(PersonProfileEntities)
+	entities = {key: value for key, value in data.items() if key in fields and value is not None}
+	for key, value in entities.items():
+		if isinstance(value, str) and len(value) > MAX_EXPRESSION_LENGTH:
+			raise ValueError(f"Field '{key}' is longer than {MAX_EXPRESSION_LENGTH} characters.")
+	try:
+		PersonProfileEntities(**entities)
+	except ValidationError as e:
+		raise ValueError(f"Output does not match the schema: {e}")
+	return entities
 
 
 class LlmNer:
-	def __init__(self):
-		config.read('config.cfg')
-		self.client = AsyncGroq(
-			api_key=config['GROQ']['API_KEY']
+	def __init__(self, settings: Settings = None, client=None, mode: str = None):
+		# Settings are only needed when the client or the mode is not given explicitly
+		if settings is None and (client is None or mode is None):
+			settings = get_settings()
+		self.api_key = settings.groq_api_key if settings else None
+		self.mode = mode or settings.ner_mode
+		self.call_timeout = settings.call_timeout if settings else None
+		self.hedge_delay = settings.hedge_delay if settings else None
+		if self.mode not in PROMPT_VARIANTS:
+			raise ValueError(f"Unknown NER mode '{self.mode}', expected one of {list(PROMPT_VARIANTS)}")
+		self._client = client
+		self._client_lock = threading.Lock()
+
+	@property
+	def client(self) -> AsyncGroq:
+		# Built from the warm-up thread or the background NER loop, whichever gets here first
+		with self._client_lock:
+			if self._client is None:
+				self._client = AsyncGroq(
+					api_key=self.api_key
+				)
+			return self._client
+
+	async def complete(self, messages: List[Dict[str, str]], deadline: Optional[Deadline] = None):
+		"""
+		Send a chat completion request using the settings of the current mode.
+		:param messages: Chat messages, without the system message
+		:param deadline: Request deadline
+		:return: Chat completion
+		:raises asyncio.TimeoutError: If the request does not finish within the deadline
+		"""
+		if self.mode == "compact":
+			sampling = {"temperature": 0, "top_p": 1, "max_tokens": COMPACT_MAX_TOKENS}
+		else:
+			sampling = {"temperature": 0.5, "top_p": 0.5, "max_tokens": 1024}
+		timeout = remaining_timeout(deadline, self.call_timeout)
+		if timeout is not None:
+			sampling["timeout"] = timeout
+		return await hedged(
+			lambda: self.client.chat.completions.create(
+				model=MODEL,
+				messages=[{"role": "system", "content": PROMPT_VARIANTS[self.mode]}] + messages,
+				stream=False,
+				seed=0,
+				response_format={"type": "json_object"},
+				**sampling
+			),
+			self.hedge_delay,
+			timeout
 		)
 
-	async def extract_entities(self, query)-> str:
+	async def extract_entities(self, query, deadline: Optional[Deadline] = None)-> str:
 		"""
 		Extract entities from the user query using the NER model.
 		:param query: User query
+		:param deadline: Request deadline
 		:return: JSON output of extracted entities
 		"""
 		print(f"Query: {query}")
-		chat_completion = await self.client.chat.completions.create(
-			model="llama3-8b-8192",
-			messages=[
-				{
-					"role": "system",
-					"content": SYSTEM_MESSAGE_NER
-				},
-				{
-					"role": "user",
-					"content": str(query)
-				}
-			],
-			temperature=0.5,
-			max_tokens=1024,
-			top_p=0.5,
-			stream=False,
-			seed=0,
-			response_format={"type": "json_object"}
-		)
-
+		chat_completion = await self.complete([{"role": "user", "content": str(query)}], deadline)
 		return chat_completion.choices[0].message.content
+
+	async def extract_validated_entities(self, query, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+		"""
+		Extract entities and validate them against the schema, asking the model to repair invalid output once.
+		:param query: User query
+		:param deadline: Request deadline
+		:return: Extracted entities, or an empty dict if none could be extracted
+		"""
+		content = await self.extract_entities(query, deadline)
+		try:
+			return parse_entities(content)
+		except ValueError as e:
+			print(f"Invalid NER output, retrying: {e}")
+			messages = [
+				{"role": "user", "content": str(query)},
+				{"role": "assistant", "content": content or ""},
+				{"role": "user", "content": f"{e} Reply with only the corrected JSON object."}
+			]
+
+		try:
+			chat_completion = await self.complete(messages, deadline)
+		except asyncio.TimeoutError:
+			print("No time left to repair NER output.")
+			return {}
+		try:
+			return parse_entities(chat_completion.choices[0].message.content)
+		except ValueError as e:
+			print(f"Invalid NER output after repair: {e}")
+			return {}
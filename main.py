@@ -1,67 +1,131 @@
 import asyncio
-import configparser
+from contextlib import asynccontextmanager
+from typing import List
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
 
 from database import Database
+from deadline import Deadline
 from llm_ner import LlmNer
 from proxy_curl import ProxycurlAPI
-from utils import UserQuery, Utils
+from serialization import FastJSONResponse, slim_profiles
+from settings import get_settings
+from utils import PersonProfile, UserQuery, Utils
+
+# Clients only store their settings here; connections are opened on first use or during warm-up
+settings = get_settings()
+proxycurl = ProxycurlAPI(settings)
+llm_ner = LlmNer(settings)
+database = Database(settings)
+utils = Utils(proxycurl, llm_ner, database)
+
+# Seconds of budget an optional stage needs to be worth starting
+ENRICHMENT_MIN_BUDGET = 8.0
+FRESHNESS_MIN_BUDGET = 4.0
+# Seconds between warm-up attempts while MongoDB is unreachable
+WARM_UP_RETRY_DELAY = 5.0
+
 
-# Load the configuration file
-config = configparser.ConfigParser()
-config.read('config.cfg')
+async def warm_up(app: FastAPI):
+	"""
+	Create indexes and open client connections concurrently, then mark the app as ready.
+	MongoDB is retried until it answers; the app stays unready (503 on /ready) until then.
+	Index errors other than connectivity failures are logged and do not block readiness.
+	:param app: FastAPI instance
+	:return: None
+	"""
+	await asyncio.gather(
+		asyncio.to_thread(lambda: llm_ner.client),
+		asyncio.to_thread(utils.get_loop)
+	)
+	while True:
+		indexed, reachable = await asyncio.gather(
+			asyncio.to_thread(database.create_indexes),
+			asyncio.to_thread(database.ping)
+		)
+		if indexed and reachable:
+			break
+		await asyncio.sleep(WARM_UP_RETRY_DELAY)
+	app.state.ready = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	# Warm up in the background so the worker starts accepting connections immediately
+	app.state.ready = False
+	warm_up_task = asyncio.create_task(warm_up(app))
+	yield
+	warm_up_task.cancel()
+	proxycurl.close()
+	database.close()
 
 # Create a new FastAPI instance
-app = FastAPI()
-proxycurl = ProxycurlAPI()
-llm_ner = LlmNer()
-database = Database()
-utils = Utils(proxycurl, llm_ner, database)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
-@app.post("/search-profiles")
+
+@app.get("/ready")
+async def ready():
+	"""
+	Readiness probe: succeeds once indexes exist and client connections are warm.
+	:return: Readiness status
+	"""
+	if not getattr(app.state, "ready", False):
+		raise HTTPException(status_code=503, detail="Service is starting up.")
+	return {"status": "ready"}
+
+@app.post("/search-profiles", response_model=List[PersonProfile])
 async def search_profiles(user_query: UserQuery):
 	"""
 	Search for profiles based on the user query.
+	The whole pipeline shares one deadline; optional stages are dropped when it runs low, and
+	best-effort results are flagged with an X-Partial-Results header listing what was cut.
 	:param user_query: User query
 	:return: List of profiles
 	"""
+	deadline = Deadline(settings.request_timeout)
+
 	# Step 1: Extract entities from the query using NER model
-	entities = utils.extract_entities(user_query.prompt)
+	try:
+		entities = await utils.extract_entities(user_query.prompt, deadline)
+	except asyncio.TimeoutError:
+		raise HTTPException(status_code=504, detail="Timed out while processing the query.")
 	if not utils.is_valid_query(entities):
 		raise HTTPException(status_code=400, detail="Your query is invalid. Please provide a valid query.")
 	# Step 2: Check for matching profiles in the database
-	profiles = await database.fetch_profiles_from_db(entities)
+	profiles = await database.fetch_profiles_from_db(entities, deadline)
 	if profiles:
 		# Step 3: Score profiles for relevance
 		profiles = await utils.score_profiles(profiles, user_query.prompt)
 		profiles = [p for p in profiles if p.get("relevance_score") > 0.8]
 
 		# Step 4: Fetch new profiles 30% of profiles from Proxycurl if necessary
-		count = int(len(profiles) * 0.3)
-		new_profiles = await utils.fetch_save_new_profiles(entities, count if count > 5 else 5)
-		profiles.extend(new_profiles)
+		if deadline.allows("enrichment", ENRICHMENT_MIN_BUDGET):
+			count = int(len(profiles) * 0.3)
+			new_profiles = await utils.fetch_save_new_profiles(entities, count if count > 5 else 5, deadline)
+			profiles.extend(new_profiles)
 	else:
 		# If no profiles are found in DB, fetch from Proxycurl directly
-		profiles  = await utils.fetch_save_new_profiles(entities)
+		profiles  = await utils.fetch_save_new_profiles(entities, deadline=deadline)
 	if not profiles:
+		if deadline.partial:
+			raise HTTPException(status_code=504, detail="Timed out before any profiles were found.")
 		raise HTTPException(status_code=404, detail="No profiles found for the given query.")
 
 	# Step 5: Store unique profiles in DB with date and time
 	# await database.store_profiles_in_db(profiles, date_time=datetime.datetime.now())
 
-	# Step 6: Re-fetch profiles from DB after updates
-	profiles = await database.fetch_profiles_from_db(entities)
+	# Step 6: Re-fetch profiles from DB after updates, keeping what we have if the search runs out of time
+	profiles = await database.fetch_profiles_from_db(entities, deadline) or profiles
 
 	# Step 7: Check freshness and enrich if necessary
-	profiles = await utils.update_and_check_freshness(profiles)
+	if deadline.allows("freshness refresh", FRESHNESS_MIN_BUDGET):
+		profiles = await utils.update_and_check_freshness(profiles, deadline)
 
 	# # Step 8: Score profiles for relevance again
-	profiles = await utils.score_profiles(profiles, user_query.query)
+	profiles = await utils.score_profiles(profiles, user_query.prompt)
 
 	# Step 9: Return profiles with limited info for display
-	return profiles
+	headers = {"X-Partial-Results": ", ".join(deadline.reasons)} if deadline.partial else None
+	return FastJSONResponse(content=slim_profiles(profiles), headers=headers)
 
 
 @app.get("/credit-balance")
@@ -74,7 +138,7 @@ async def get_credit_balance():
 	credit_balance = await proxycurl.get_credit_balance()
 	if not credit_balance:
 		raise HTTPException(status_code=500, detail="Failed to fetch credit balance.")
-	return JSONResponse(content=credit_balance)
+	return FastJSONResponse(content=credit_balance)
 
 @app.get("/get-profile-pic")
 async def get_profile_pic(profile_url: str):
@@ -95,4 +159,4 @@ async def get_profile_pic(profile_url: str):
 	# update the profile_pic_url in the profile object also in another thread
 	asyncio.create_task(database.update_profile_pic(profile_url, profile_pic.get("tmp_profile_pic_url")))
 
-	return JSONResponse(content=profile_pic)
+	return FastJSONResponse(content=profile_pic)
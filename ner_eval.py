@@ -0,0 +1,193 @@
+"""
+Offline evaluation of the NER prompt variants.
+
+Runs a fixed set of queries through `LlmNer` for each prompt variant and reports
+field accuracy, schema validity, token usage and latency. Responses are recorded
+once against the live Groq API and replayed afterwards, so prompt changes can be
+compared without network access or API cost.
+
+The committed ner_recordings.json holds canned responses (the answers documented in
+the full prompt's examples, with character-based token estimates and no latency),
+so the harness runs out of the box. Re-record against Groq for real numbers.
+
+Usage:
+	python ner_eval.py --record    # call Groq and save responses to ner_recordings.json
+	python ner_eval.py             # replay the recorded responses
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from llm_ner import PROMPT_VARIANTS, LlmNer
+
+EVAL_CASES = [
+	{
+		"query": "I need a backend developer with 3 years of experience skilled in Python and Django, preferably located in Islamabad.",
+		"expected": {"country": "PK", "city": "Islamabad", "current_role_title": "Backend Developer || Backend Engineer",
+					 "skills": "Python && Django"}
+	},
+	{
+		"query": "Looking for a Senior Data Scientist with 5 years of experience in Machine Learning and Python, might be deep learning located in Berlin.",
+		"expected": {"country": "DE", "city": "Berlin", "current_role_title": "Senior Data Scientist",
+					 "skills": "Machine Learning && Python || Deep Learning"}
+	},
+	{
+		"query": "Need a Full Stack Developer with 2 years of experience in React and Node.js in Lahore or Islamabad.",
+		"expected": {"country": "PK", "city": "Lahore || Islamabad",
+					 "current_role_title": "Full Stack Developer || Full Stack Engineer", "skills": "React && Node.js"}
+	},
+	{
+		"query": "I need a Software Engineer with 4 years of experience in Java and Spring Boot.",
+		"expected": {"country": "PK", "city": "Lahore", "current_role_title": "Software Engineer || Software Developer",
+					 "skills": "Java && Spring Boot"}
+	},
+	{
+		"query": "Looking for a Data Analyst with 3 years of experience in SQL and Tableau, (may also include PowerBI) in Paris.",
+		"expected": {"country": "FR", "city": "Paris", "current_role_title": "Data Analyst",
+					 "skills": "SQL && Tableau || PowerBI"}
+	},
+	{
+		"query": "Hello guys how are you",
+		"expected": {}
+	},
+]
+
+
+def recording_key(params: Dict[str, Any]) -> str:
+	return hashlib.sha1(json.dumps(params["messages"], sort_keys=True).encode("utf-8")).hexdigest()
+
+def as_completion(record: Dict[str, Any]):
+	"""
+	Wrap a recorded response so it looks like a Groq chat completion.
+	"""
+	return SimpleNamespace(
+		choices=[SimpleNamespace(message=SimpleNamespace(content=record["content"]))],
+		usage=SimpleNamespace(**record["usage"])
+	)
+
+
+class RecordedClient:
+	"""
+	Stand-in for `AsyncGroq` that replays recorded chat completions, or records them from a live client.
+	"""
+	def __init__(self, recordings: Dict[str, Any], live_client=None):
+		self.recordings = recordings
+		self.live_client = live_client
+		self.calls: List[Dict[str, Any]] = []
+		self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+	async def create(self, **params):
+		key = recording_key(params)
+		if self.live_client is not None:
+			start = time.perf_counter()
+			completion = await self.live_client.chat.completions.create(**params)
+			self.recordings[key] = {
+				"content": completion.choices[0].message.content,
+				"usage": {
+					"prompt_tokens": completion.usage.prompt_tokens,
+					"completion_tokens": completion.usage.completion_tokens
+				},
+				"latency": time.perf_counter() - start
+			}
+		if key not in self.recordings:
+			raise KeyError("No recorded response for this request; run with --record first.")
+		record = self.recordings[key]
+		self.calls.append(record)
+		return as_completion(record)
+
+
+def normalize(value: Any) -> str:
+	return " ".join(str(value or "").lower().split())
+
+def score_case(entities: Dict[str, Any], expected: Dict[str, Any]) -> float:
+	"""
+	Fraction of expected fields extracted exactly (case and whitespace insensitive).
+	An empty expectation means the query is irrelevant, so no field may be filled in except defaults.
+	"""
+	if not expected:
+		filled = [k for k, v in entities.items() if v and k not in ("country", "city", "page_size")]
+		return 0.0 if filled else 1.0
+	matches = sum(normalize(entities.get(key)) == normalize(value) for key, value in expected.items())
+	return matches / len(expected)
+
+
+async def evaluate(variant: str, client: RecordedClient) -> Dict[str, float]:
+	"""
+	Evaluate one prompt variant over all cases.
+	:param variant: Prompt variant name
+	:param client: Recorded client
+	:return: Aggregated metrics
+	"""
+	llm_ner = LlmNer(client=client, mode=variant)
+	scores, valid = [], 0
+	client.calls.clear()
+	for case in EVAL_CASES:
+		entities = await llm_ner.extract_validated_entities(case["query"])
+		# An empty result for a relevant query means validation failed even after repair
+		valid += bool(entities) or not case["expected"]
+		scores.append(score_case(entities, case["expected"]))
+
+	calls = client.calls
+	# Canned responses carry no latency
+	latencies = sorted(call["latency"] for call in calls if call.get("latency") is not None)
+	return {
+		"accuracy": sum(scores) / len(scores),
+		"valid": valid / len(EVAL_CASES),
+		"calls": len(calls) / len(EVAL_CASES),
+		"prompt_tokens": sum(call["usage"]["prompt_tokens"] for call in calls) / len(EVAL_CASES),
+		"completion_tokens": sum(call["usage"]["completion_tokens"] for call in calls) / len(EVAL_CASES),
+		"latency_p50": latencies[len(latencies) // 2] if latencies else None,
+		"latency_max": latencies[-1] if latencies else None
+	}
+
+def format_seconds(value: Any) -> str:
+	return f"{value:>8.2f}" if value is not None else f"{'-':>8}"
+
+
+async def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compare NER prompt variants on recorded responses.")
+	parser.add_argument("--recordings", default="ner_recordings.json", help="Recorded responses file")
+	parser.add_argument("--record", action="store_true", help="Call the Groq API and update the recordings")
+	parser.add_argument("--variants", nargs="+", default=list(PROMPT_VARIANTS), choices=list(PROMPT_VARIANTS))
+	args = parser.parse_args(argv)
+
+	recordings = {}
+	if os.path.exists(args.recordings):
+		with open(args.recordings, "r", encoding="utf-8") as f:
+			recordings = json.load(f)
+	live_client = LlmNer(mode="full").client if args.record else None
+	client = RecordedClient(recordings, live_client)
+
+	if not args.record and recordings.get("_meta", {}).get("source") == "canned":
+		print(f"WARNING: {args.recordings} holds canned responses, not recorded model output. Accuracy, validity "
+			  "and token figures below are placeholders and do not compare the variants; run with --record for "
+			  "real numbers.\n")
+
+	print(f"{'variant':<10}{'system chars':>14}{'accuracy':>10}{'valid':>8}{'calls':>7}"
+		  f"{'prompt tok':>12}{'compl tok':>11}{'p50 s':>8}{'max s':>8}")
+	for variant in args.variants:
+		try:
+			metrics = await evaluate(variant, client)
+		except KeyError as e:
+			print(f"{variant:<10}{len(PROMPT_VARIANTS[variant]):>14}  {e}")
+			continue
+		print(f"{variant:<10}{len(PROMPT_VARIANTS[variant]):>14}{metrics['accuracy']:>10.2f}{metrics['valid']:>8.2f}"
+			  f"{metrics['calls']:>7.2f}{metrics['prompt_tokens']:>12.0f}{metrics['completion_tokens']:>11.0f}"
+			  f"{format_seconds(metrics['latency_p50'])}{format_seconds(metrics['latency_max'])}")
+
+	if args.record:
+		# Live responses replace the canned ones, so the canned note no longer applies
+		recordings.pop("_meta", None)
+		with open(args.recordings, "w", encoding="utf-8") as f:
+			json.dump(recordings, f, indent=2)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(asyncio.run(main()))
@@ -1,3 +1,6 @@
+from typing import Any, Dict, Optional, Type
+from urllib.parse import urlsplit
+
 from pydantic import BaseModel
 
 
@@ -12,3 +15,53 @@ class PersonProfileEntities(BaseModel):
 	headline: str = None
 	skills: str = None
 	page_size: int = 10
+
+LINKEDIN_PREFIX = "https://www.linkedin.com/in/"
+
+
+def canonical_profile_url(url: Any) -> Optional[str]:
+	"""
+	Canonical form of a LinkedIn profile URL, used as the unique `linkedin_profile_url` key.
+	Scheme and host are lowercased, country subdomains (e.g. pk.linkedin.com) map to www, and the query
+	string, fragment and trailing slash are dropped so the same profile always maps to the same key.
+	:param url: Profile URL
+	:return: Canonical URL, or None if it is not a LinkedIn profile URL
+	"""
+	if not url or not isinstance(url, str):
+		return None
+	url = url.strip()
+	if "://" not in url:
+		url = "https://" + url
+	parts = urlsplit(url)
+	host = (parts.hostname or "").lower()
+	if parts.scheme.lower() not in ("http", "https") or not (host == "linkedin.com" or host.endswith(".linkedin.com")):
+		return None
+	path = parts.path.rstrip("/")
+	if not path.startswith("/in/") or len(path) == len("/in/"):
+		return None
+	return LINKEDIN_PREFIX + path[len("/in/"):]
+
+
+# Helpers that work with both pydantic v1 and v2
+
+def model_field_types(model: Type[BaseModel]) -> Dict[str, Any]:
+	"""
+	Map each field of a pydantic model to its type.
+	:param model: Pydantic model class
+	:return: Field name to type
+	"""
+	if hasattr(model, "model_fields"):
+		return {name: field.annotation for name, field in model.model_fields.items()}
+	return {name: field.outer_type_ for name, field in model.__fields__.items()}
+
+def validate_model(model: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+	"""
+	Validate a dict against a pydantic model.
+	:raises pydantic.ValidationError: If the data does not match the model
+	"""
+	if hasattr(model, "model_validate"):
+		return model.model_validate(data)
+	return model.parse_obj(data)
+
+def dump_model(instance: BaseModel) -> Dict[str, Any]:
+	return instance.model_dump() if hasattr(instance, "model_dump") else instance.dict()
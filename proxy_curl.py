@@ -1,16 +1,24 @@
-import configparser
-from typing import List, Dict, Any
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional
 
 import requests
 
+from deadline import Deadline, hedged, remaining_timeout
 from person_profile import PersonProfileEntities
+from settings import Settings, get_settings
 
-config = configparser.ConfigParser()
 
 class ProxycurlAPI:
-	def __init__(self):
-		config.read('config.cfg')
-		self.api_key = config['PROXYCURL']['API_KEY']
+	def __init__(self, settings: Settings = None):
+		settings = settings or get_settings()
+		self.api_key = settings.proxycurl_api_key
+		self.call_timeout = settings.call_timeout
+		self.hedge_delay = settings.hedge_delay
+		# Dedicated pool: abandoned (timed out or hedged) requests keep their thread until the call timeout,
+		# and must not starve the default executor used for MongoDB calls
+		self.executor = ThreadPoolExecutor(max_workers=settings.proxycurl_max_workers, thread_name_prefix="proxycurl")
 		self.base_url = 'https://nubela.co/proxycurl/api'
 		self.version = "v2"
 		self.headers = {
@@ -18,12 +26,44 @@ class ProxycurlAPI:
 			'Accept': 'application/json',
 		}
 
+	def close(self):
+		"""
+		Shut down the request thread pool without waiting for in-flight requests.
+		:return: None
+		"""
+		self.executor.shutdown(wait=False, cancel_futures=True)
+
+	async def _get(self, url: str, params: dict = None, deadline: Optional[Deadline] = None,
+				   hedge: bool = False) -> requests.Response:
+		"""
+		Send a GET request off the event loop, bounded by the per-call timeout and the request deadline.
+		:param url: Request URL
+		:param params: Query parameters
+		:param deadline: Request deadline
+		:param hedge: Whether a slow request may be hedged with a second attempt
+		:return: Response
+		"""
+		try:
+			timeout = remaining_timeout(deadline, self.call_timeout)
+			send = partial(requests.get, url, headers=self.headers, params=params, timeout=timeout)
+			return await hedged(
+				lambda: asyncio.get_running_loop().run_in_executor(self.executor, send),
+				self.hedge_delay if hedge else None,
+				timeout
+			)
+		except (asyncio.TimeoutError, requests.Timeout):
+			if deadline:
+				deadline.mark_partial("proxycurl timeout")
+			raise
+
 	# Search for profiles based on the user query
-	async def fetch_profile_urls(self, entities: PersonProfileEntities, count: int) -> List[Dict[str, Any]]:
+	async def fetch_profile_urls(self, entities: PersonProfileEntities, count: int,
+								 deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
 		"""
 		Fetch profile URLs based on the user query.
 		:param entities: Extracted entities from the user query
 		:param count: Number of profiles to fetch
+		:param deadline: Request deadline
 		:return: List of profile URLs
 		"""
 		url = f'{self.base_url}/{self.version}/search/person'
@@ -47,7 +87,7 @@ class ProxycurlAPI:
 		params = {key: value for key, value in params.items() if value}
 
 		try:
-			response = requests.get(url, headers=self.headers, params=params)
+			response = await self._get(url, params, deadline)
 			if response.status_code == 200:
 				return response.json()['results']
 			elif response.status_code == 400:
@@ -60,10 +100,11 @@ class ProxycurlAPI:
 			return []
 
 	# Fetch the full profile data from the Proxycurl API
-	async def fetch_full_profile(self, profile_url: str) -> Dict[str, Any]:
+	async def fetch_full_profile(self, profile_url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
 		"""
 		Fetch the full profile data from the Proxycurl API.
 		:param profile_url: LinkedIn profile URL
+		:param deadline: Request deadline
 		:return: Full profile data
 		"""
 		url = f'{self.base_url}/{self.version}/linkedin'
@@ -75,7 +116,7 @@ class ProxycurlAPI:
 		}
 
 		try:
-			response = requests.get(url, headers=self.headers, params=params)
+			response = await self._get(url, params, deadline, hedge=True)
 			if response.status_code == 200:
 				return response.json()
 			else:
@@ -92,7 +133,7 @@ class ProxycurlAPI:
 		"""
 		url = f'{self.base_url}/credit-balance'
 		try:
-			response = requests.get(url, headers=self.headers)
+			response = await self._get(url)
 			if response.status_code == 200:
 				return response.json()
 			else:
@@ -113,7 +154,7 @@ class ProxycurlAPI:
 			'linkedin_person_profile_url': profile_url
 		}
 		try:
-			response = requests.get(url, headers=self.headers, params=params)
+			response = await self._get(url, params)
 			if response.status_code == 200:
 				return response.json()
 			elif response.status_code == 404:
@@ -0,0 +1,41 @@
+from typing import Any, Dict, Iterable, List
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+
+from person_profile import dump_model, model_field_types, validate_model
+from utils import PersonProfile
+
+PERSON_PROFILE_FIELDS = tuple(model_field_types(PersonProfile))
+
+
+class FastJSONResponse(JSONResponse):
+	"""
+	JSON response rendered with orjson, which serializes datetimes natively and skips jsonable_encoder.
+	"""
+	def render(self, content: Any) -> bytes:
+		return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def slim_profile(document: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Copy only the PersonProfile fields of a stored or freshly enriched profile.
+	:param document: Profile from MongoDB or Proxycurl
+	:return: Slim profile
+	"""
+	return {field: document.get(field) for field in PERSON_PROFILE_FIELDS}
+
+def slim_profiles(profiles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""
+	Reduce profiles to the PersonProfile fields and validate them, dropping any that do not match the model.
+	:param profiles: Profiles from MongoDB or Proxycurl
+	:return: Slim profiles, ready for FastJSONResponse
+	"""
+	slim = []
+	for profile in profiles:
+		try:
+			slim.append(dump_model(validate_model(PersonProfile, slim_profile(profile))))
+		except ValidationError as e:
+			print(f"Dropping invalid profile {profile.get('linkedin_profile_url')}: {e}")
+	return slim
@@ -0,0 +1,56 @@
+import configparser
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class MongoSettings(BaseModel):
+	user_name: str
+	password: str
+	cluster: str
+	db: str
+	collection: str
+
+	@property
+	def uri(self) -> str:
+		return f"mongodb+srv://{self.user_name}:{self.password}@{self.cluster}?retryWrites=true&w=majority"
+
+class Settings(BaseModel):
+	mongodb: MongoSettings
+	groq_api_key: str
+	proxycurl_api_key: str
+	ner_mode: str = "full"
+	# Overall budget for a /search-profiles request and the cap for a single outbound call, in seconds
+	request_timeout: float = 25.0
+	call_timeout: float = 10.0
+	# Delay after which a slow call is hedged with a second attempt; None disables hedging
+	hedge_delay: Optional[float] = None
+	# Threads shared by all outbound Proxycurl requests in the process
+	proxycurl_max_workers: int = 8
+
+@lru_cache(maxsize=None)
+def get_settings(path: str = "config.cfg") -> Settings:
+	"""
+	Parse the configuration file once and return the typed settings.
+	:param path: Path to the configuration file
+	:return: Settings
+	"""
+	config = configparser.ConfigParser()
+	config.read(path)
+	return Settings(
+		mongodb=MongoSettings(
+			user_name=config["MONGODB"]["USER_NAME"],
+			password=config["MONGODB"]["PASSWORD"],
+			cluster=config["MONGODB"]["CLUSTER"],
+			db=config["MONGODB"]["DB"],
+			collection=config["MONGODB"]["COLLECTION"]
+		),
+		groq_api_key=config["GROQ"]["API_KEY"],
+		proxycurl_api_key=config["PROXYCURL"]["API_KEY"],
+		ner_mode=config.get("NER", "MODE", fallback="full"),
+		request_timeout=config.getfloat("TIMEOUTS", "REQUEST", fallback=25.0),
+		call_timeout=config.getfloat("TIMEOUTS", "CALL", fallback=10.0),
+		hedge_delay=config.getfloat("TIMEOUTS", "HEDGE_DELAY", fallback=None),
+		proxycurl_max_workers=config.getint("PROXYCURL", "MAX_WORKERS", fallback=8)
+	)
@@ -0,0 +1,17 @@
+from person_profile import canonical_profile_url
+
+
+def test_canonical_profile_url_merges_url_variants():
+	urls = [
+		"https://www.linkedin.com/in/jane",
+		"https://WWW.LinkedIn.com/in/jane/",
+		"linkedin.com/in/jane?trk=public_profile",
+		"http://pk.linkedin.com/in/jane#about",
+	]
+	assert {canonical_profile_url(url) for url in urls} == {"https://www.linkedin.com/in/jane"}
+
+
+def test_canonical_profile_url_rejects_non_profile_urls():
+	assert canonical_profile_url("https://www.linkedin.com/company/acme") is None
+	assert canonical_profile_url("https://example.com/in/jane") is None
+	assert canonical_profile_url(None) is None
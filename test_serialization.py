@@ -0,0 +1,53 @@
+import asyncio
+import datetime
+
+from person_profile import validate_model
+from serialization import slim_profile, slim_profiles
+from utils import PersonProfile, Utils
+
+
+class FakeProxycurl:
+	async def fetch_full_profile(self, profile_url, deadline=None):
+		# Shaped like the Proxycurl /v2/linkedin payload, which does not echo the profile URL back
+		return {
+			"full_name": "Jane Doe",
+			"profile_pic_url": "https://example.com/pic.jpg",
+			"headline": "Backend Engineer",
+			"city": "Lahore",
+			"experiences": [{"starts_at": {"day": 1, "month": 1, "year": 2020}}]
+		}
+
+
+class FakeDatabase:
+	async def store_profiles_in_db(self, profiles, date_time, deadline=None):
+		for profile in profiles:
+			profile["last_updated"] = date_time
+
+
+def test_refreshed_profile_is_a_valid_person_profile():
+	utils = Utils(FakeProxycurl(), None, FakeDatabase())
+	stale = {
+		"linkedin_profile_url": "https://www.linkedin.com/in/jane",
+		"relevance_score": 0.9,
+		"last_updated": datetime.datetime.now() - datetime.timedelta(days=60)
+	}
+
+	refreshed = asyncio.run(utils.update_and_check_freshness([stale]))
+	profiles = slim_profiles(refreshed)
+
+	assert len(profiles) == 1
+	profile = validate_model(PersonProfile, profiles[0])
+	assert profile.linkedin_profile_url == "https://www.linkedin.com/in/jane"
+	assert profile.full_name == "Jane Doe"
+	assert profile.relevance_score == 0.9
+	assert "experiences" not in profiles[0]
+
+
+def test_slim_profiles_drops_profiles_without_url():
+	assert slim_profiles([{"full_name": "No URL"}]) == []
+
+
+def test_slim_profile_keeps_whole_values():
+	profile = slim_profile({"linkedin_profile_url": "https://www.linkedin.com/in/xyz", "city": "Lahore"})
+	assert profile["linkedin_profile_url"] == "https://www.linkedin.com/in/xyz"
+	assert profile["city"] == "Lahore"
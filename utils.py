@@ -1,36 +1,58 @@
 import asyncio
 import datetime
-import json
 import threading
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from pydantic import BaseModel
 
+from deadline import Deadline, remaining_timeout
 from person_profile import PersonProfileEntities
 
 
 class PersonProfile(BaseModel):
-	full_name: str
-	profile_pic_url: str
-	profile_url: str
-	relevance_score: float
+	"""
+	Profile fields returned to clients; everything else in the stored Proxycurl document is dropped.
+	"""
+	full_name: Optional[str] = None
+	profile_pic_url: Optional[str] = None
+	background_cover_image_url: Optional[str] = None
+	linkedin_profile_url: str
+	headline: Optional[str] = None
+	city: Optional[str] = None
+	last_updated: Optional[datetime.datetime] = None
+	relevance_score: Optional[float] = None
 
 class UserQuery(BaseModel):
 	prompt: str
 
+# Maximum concurrent Proxycurl profile fetches for a single request
+PROFILE_FETCH_CONCURRENCY = 5
+
 class Utils:
 	def __init__(self, proxycurl, llm_ner, database):
 		self.proxycurl = proxycurl
 		self.llm_ner = llm_ner
 		self.database = database
-		self.loop = asyncio.new_event_loop()
-		self.thread = threading.Thread(target=self.start_loop, daemon=True)
-		self.thread.start()
+		self.loop = None
+		self.thread = None
+		self._loop_lock = threading.Lock()
 
 	def start_loop(self):
 		asyncio.set_event_loop(self.loop)
 		self.loop.run_forever()
 
+	def get_loop(self) -> asyncio.AbstractEventLoop:
+		"""
+		Start the background event loop used for NER calls on first use.
+		:return: Background event loop
+		"""
+		with self._loop_lock:
+			if self.loop is None:
+				self.loop = asyncio.new_event_loop()
+				self.thread = threading.Thread(target=self.start_loop, daemon=True)
+				self.thread.start()
+		return self.loop
+
 	@staticmethod
 	def is_fresh(profile: Dict[str, Any]) -> bool:
 		"""
@@ -59,54 +81,76 @@ class Utils:
 
 		return True
 
-	def extract_entities(self, query: str) -> dict:
+	async def extract_entities(self, query: str, deadline: Optional[Deadline] = None) -> dict:
 		"""
 		Extract entities from the user query using the LLM NER model.
 		:param query: User query
+		:param deadline: Request deadline
 		:return: Extracted entities
+		:raises asyncio.TimeoutError: If extraction does not finish within the deadline
 		"""
-		future = asyncio.run_coroutine_threadsafe(self.llm_ner.extract_entities(query), self.loop)
-		entities = future.result()
-
-		return json.loads(entities)
-
-	async def fetch_save_new_profiles(self, entities: dict, count: int = 5) -> List[Dict[str, Any]]:
+		future = asyncio.run_coroutine_threadsafe(
+			self.llm_ner.extract_validated_entities(query, deadline), self.get_loop()
+		)
+		try:
+			return await asyncio.wait_for(asyncio.wrap_future(future), remaining_timeout(deadline))
+		except asyncio.TimeoutError:
+			future.cancel()
+			raise
+
+	async def fetch_save_new_profiles(self, entities: dict, count: int = 5,
+									  deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
 		"""
 		Fetch new profiles from the Proxycurl API based on the extracted entities.
 		:param entities: Extracted entities
 		:param count: Number of profiles to fetch
+		:param deadline: Request deadline; profiles that cannot be fetched in time are left out
 		:return: List of profiles
 		"""
 		entities = PersonProfileEntities(**entities)
-		profiles = await self.proxycurl.fetch_profile_urls(entities, count)
+		profiles = await self.proxycurl.fetch_profile_urls(entities, count, deadline)
 		print(profiles)
-		full_profiles = []
-		for profile in profiles:
+		semaphore = asyncio.Semaphore(PROFILE_FETCH_CONCURRENCY)
+
+		async def fetch_full_profile(profile):
 			# Fetch the full profile data from the Proxycurl API
 			print(profile['linkedin_profile_url'])
-			full_profile = await self.proxycurl.fetch_full_profile(profile['linkedin_profile_url'])
-			if not full_profile:
-				continue
-			full_profile['linkedin_profile_url'] = profile['linkedin_profile_url']
-			full_profiles.append(full_profile)
+			async with semaphore:
+				full_profile = await self.proxycurl.fetch_full_profile(profile['linkedin_profile_url'], deadline)
+			if full_profile:
+				full_profile['linkedin_profile_url'] = profile['linkedin_profile_url']
+			return full_profile
+
+		full_profiles = await asyncio.gather(*[fetch_full_profile(profile) for profile in profiles])
+		full_profiles = [profile for profile in full_profiles if profile]
 
 		# Store the new profiles in the database
-		await self.database.store_profiles_in_db(full_profiles, datetime.datetime.now())
+		await self.database.store_profiles_in_db(full_profiles, datetime.datetime.now(), deadline)
 
 		return full_profiles
 
-	async def update_and_check_freshness(self, profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	async def update_and_check_freshness(self, profiles: List[Dict[str, Any]],
+										 deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
 		"""
 		Update and check the freshness of the profiles.
 		:param profiles: List of profiles
+		:param deadline: Request deadline; profiles that cannot be refreshed in time are returned as they are
 		:return: List of updated profiles
 		"""
+		semaphore = asyncio.Semaphore(PROFILE_FETCH_CONCURRENCY)
+
 		async def update_profile(profile):
 			if self.is_fresh(profile):
 				return profile
 			else:
-				enriched_profile = await self.proxycurl.fetch_full_profile(profile['linkedin_profile_url'])
-				await self.database.store_profiles_in_db([enriched_profile], datetime.datetime.now())
+				async with semaphore:
+					enriched_profile = await self.proxycurl.fetch_full_profile(profile['linkedin_profile_url'], deadline)
+				if not enriched_profile:
+					return profile
+				# The Proxycurl profile payload does not include the URL it was fetched for
+				enriched_profile['linkedin_profile_url'] = profile['linkedin_profile_url']
+				enriched_profile.setdefault('relevance_score', profile.get('relevance_score'))
+				await self.database.store_profiles_in_db([enriched_profile], datetime.datetime.now(), deadline)
 				return enriched_profile
 
 		tasks = [update_profile(profile) for profile in profiles]